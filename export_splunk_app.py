@@ -7,6 +7,10 @@ It prompts for an app name and downloads the app package.
 
 Requirements:
 - requests library (pip install requests)
+- Optional: orjson (pip install orjson) for faster parsing of large app lists
+- Optional: zstandard (pip install zstandard) for --archive .tar.zst output
+- Optional: httpx with HTTP/2 support (pip install 'httpx[http2]') for
+  multiplexed downloads with --http2
 - Valid JWT authentication token for Splunk Cloud ACS
 - Access to the Admin Config Service
 
@@ -21,19 +25,519 @@ Authentication:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
 import json
 import getpass
 import sys
 import os
-from urllib.parse import urljoin
+import re
+import queue
+import ssl
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache, partial
+from urllib.parse import unquote
 import argparse
 
+# Optional: orjson decodes large app listings faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: zstandard compresses --archive output as .tar.zst
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Number of apps downloaded concurrently by export_all_apps
+DEFAULT_MAX_WORKERS = 8
+
+# Read size for streaming app downloads to disk (1 MiB)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Downloaded chunks buffered between the network reader thread and the disk writer
+DOWNLOAD_QUEUE_DEPTH = 8
+
+# Keep-alive connections held per host; sized above DEFAULT_MAX_WORKERS so
+# parallel exports reuse connections instead of re-handshaking TLS
+HTTP_POOL_SIZE = 32
+
+# Connection limits for the optional HTTP/2 download client
+HTTP2_MAX_CONNECTIONS = 64
+
+# Seconds the HTTP/2 download client waits on a connect or a stalled read
+HTTP2_TIMEOUT = 60
+
+# Transient HTTP statuses retried (with exponential backoff) on every request
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Downloads bound for an --archive are held in memory up to this size (then
+# spill to a temp file) until the archive is free to append them
+ARCHIVE_SPOOL_SIZE = 4 << 20
+
+# _archive_mode result for .tar.zst archives compressed with the zstandard package
+ZSTANDARD_ARCHIVE_MODE = 'zstandard'
+
+# Record of previous bulk exports kept in the output directory, used to skip
+# re-downloading apps that haven't changed
+EXPORT_MANIFEST = '.export_manifest.json'
+
+# Mode for downloaded packages; mkstemp creates 0600 files, so apply the
+# process umask (read once here, since reading it means briefly changing it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+PACKAGE_FILE_MODE = 0o666 & ~_UMASK
+
+# Content-Disposition filenames: the RFC 5987 filename*=charset'lang'value form
+# (percent-encoded) and the plain filename="..." form (taken literally)
+_FILENAME_EXT_RE = re.compile(r'filename\*\s*=\s*([^\';]*)\'[^\']*\'([^;\s]+)', re.IGNORECASE)
+_FILENAME_RE = re.compile(r'filename\s*=\s*"?([^";]+)"?', re.IGNORECASE)
+
+# Errors that can surface while streaming an app package to disk
+# (--http2 adds httpx's errors when the client is created)
+DOWNLOAD_ERRORS = (requests.exceptions.RequestException, Urllib3HTTPError, OSError)
+
+# Apps requested per list_apps page (ACS defaults to 30)
+LIST_APPS_PAGE_SIZE = 500
+
+# Largest page ACS is known to return regardless of count; a full page of
+# this size may be clamped rather than the last one
+LIST_APPS_SERVER_CAP = 100
+
+# App attributes export_all_apps reads from list_apps (name and Splunkbase
+# filtering, version for the export manifest)
+EXPORT_APP_FIELDS = ('name', 'is_splunkbase_app', 'version')
+
+# Response keys ACS may use to hand back a pagination cursor
+CURSOR_KEYS = ('cursor', 'next_cursor')
+
+
+def _next_cursor(apps_data):
+    """Return the pagination cursor from a list response, if the server sent one"""
+    for key in CURSOR_KEYS:
+        cursor = apps_data.get(key)
+        if cursor:
+            return cursor
+    return None
+
+
+def _disposition_filename(cd):
+    """Return the filename from a Content-Disposition header, preferring filename*"""
+    match = _FILENAME_EXT_RE.search(cd)
+    if match:
+        charset, value = match.groups()
+        try:
+            return unquote(value, encoding=charset or 'utf-8', errors='replace')
+        except LookupError:
+            return unquote(value, errors='replace')  # Unknown charset
+    match = _FILENAME_RE.search(cd)
+    if match:
+        return match.group(1)
+    return None
+
+
+def _package_filename(app_name, headers):
+    """Return the file name for an app package download, from Content-Disposition when present"""
+    filename = f"{app_name}.spl"
+    if 'content-disposition' in headers:
+        # Never write outside the output directory
+        filename = os.path.basename(_disposition_filename(headers['content-disposition']) or '') or filename
+    return filename
+
+
+def _total_count(apps_data, headers):
+    """Return the total app count reported by a list response, or None if absent"""
+    total = apps_data.get('total', headers.get('X-Total-Count'))
+    try:
+        return int(total)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_export_params(local_only=False, include_default=True, include_users=False):
+    """Build the export query parameters selecting which app directories to include"""
+    if local_only:
+        return {'local': 'true', 'default': 'false', 'users': 'false'}
+    return {
+        'local': 'true',  # Always include local
+        'default': 'true' if include_default else 'false',
+        'users': 'true' if include_users else 'false'
+    }
+
+
+def _describe_export_params(params):
+    """Human-readable summary of the directories selected by export params"""
+    dirs = [f"{name}/" for name in ('local', 'default', 'users') if params.get(name) == 'true']
+    if dirs == ['local/']:
+        return "local/ directory only"
+    return f"directories: {', '.join(dirs)}"
+
+
+def _load_manifest(output_dir):
+    """Load the record of previous bulk exports in output_dir (empty if none)"""
+    try:
+        with open(os.path.join(output_dir, EXPORT_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(output_dir, manifest):
+    """Atomically write the bulk export record to output_dir"""
+    manifest_path = os.path.join(output_dir, EXPORT_MANIFEST)
+    tmp_path = manifest_path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _previous_export(manifest, app_name, output_dir, params):
+    """Return the manifest entry for app_name if its package is still on disk as recorded"""
+    entry = manifest.get(app_name)
+    if not entry or entry.get('params') != params:
+        return None
+    try:
+        if os.path.getsize(os.path.join(output_dir, entry['filename'])) != entry.get('size'):
+            return None
+    except (OSError, KeyError):
+        return None
+    return entry
+
+
+def _parse_json(response):
+    """Decode a JSON response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+@lru_cache(maxsize=1)
+def _appinspect_available():
+    """Check once per run whether the splunk-appinspect CLI can be executed"""
+    try:
+        result = subprocess.run(['splunk-appinspect', '--version'], 
+                             capture_output=True, text=True)
+        return result.returncode == 0
+    except FileNotFoundError:
+        return False
+
+
+def _prefetch(chunks, depth=DOWNLOAD_QUEUE_DEPTH):
+    """Yield from chunks while a background thread reads up to depth chunks ahead
+    
+    Errors raised while reading are re-raised in the consuming thread. If the
+    consumer stops early, the reader thread is told to stop and joined.
+    """
+    buffered = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item):
+        # Give up on a full queue once the consumer has gone away
+        while not stop.is_set():
+            try:
+                buffered.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def reader():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+        except Exception as e:
+            put(e)
+        else:
+            put(done)
+    
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffered.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _write_response(response, f):
+    """Copy a download response body (requests or httpx) into f, returning the bytes written
+    
+    For requests, reads straight from the raw urllib3 stream, skipping
+    requests' per-chunk generator. Network reads run ahead on a separate
+    thread (see _prefetch) so they overlap with the writes to f.
+    """
+    if hasattr(response, 'iter_bytes'):
+        # httpx streaming response
+        chunks = response.iter_bytes(DOWNLOAD_CHUNK_SIZE)
+    else:
+        response.raw.decode_content = True
+        chunks = iter(partial(response.raw.read, DOWNLOAD_CHUNK_SIZE), b'')
+    
+    written = 0
+    for chunk in _prefetch(chunks):
+        n = f.write(chunk)
+        while n < len(chunk):
+            # Unbuffered writes may be partial
+            n += f.write(memoryview(chunk)[n:])
+        written += n
+    return written
+
+
+def _save_response(response, output_path):
+    """Stream a download response straight to output_path
+    
+    Writes into an unbuffered, uniquely named .part file next to
+    output_path, skipping the BufferedWriter copy, and only replaces
+    output_path once the download has completed, so a failed download never
+    clobbers a previous export. When
+    the body isn't content-encoded, Content-Length is the file size and
+    the file is preallocated up front. Returns the number of bytes written.
+    """
+    content_length = response.headers.get('Content-Length')
+    fd, partial_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or '.', suffix='.part')
+    
+    try:
+        with open(fd, 'wb', buffering=0) as f:
+            if hasattr(os, 'fchmod'):
+                os.fchmod(f.fileno(), PACKAGE_FILE_MODE)
+            preallocated = False
+            if content_length and 'Content-Encoding' not in response.headers and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, int(content_length))
+                    preallocated = True
+                except (OSError, ValueError):
+                    pass  # Preallocation is only an optimization
+            written = _write_response(response, f)
+            
+            if preallocated:
+                # Drop any preallocated tail if the body came up short
+                f.truncate(written)
+        os.replace(partial_path, output_path)
+    except BaseException:
+        # Don't leave a truncated (possibly preallocated) package behind
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    
+    return written
+
+
+def _archive_mode(archive_path):
+    """Return the tarfile write mode for an --archive path, based on its extension
+    
+    Supports .tar.zst/.tzst (zstandard package, or Python 3.14+), .tar.gz/.tgz
+    and plain .tar. Raises ValueError for other extensions, or for .tar.zst
+    when no zstd codec is available.
+    """
+    name = archive_path.lower()
+    if name.endswith(('.tar.zst', '.tzst')):
+        if zstandard is not None:
+            return ZSTANDARD_ARCHIVE_MODE
+        if 'zst' not in tarfile.TarFile.OPEN_METH:
+            raise ValueError("zstandard is required for .tar.zst archives (pip install zstandard)")
+        return 'w|zst'
+    if name.endswith(('.tar.gz', '.tgz')):
+        return 'w|gz'
+    if name.endswith('.tar'):
+        return 'w|'
+    raise ValueError(f"Unsupported archive type '{archive_path}' (use .tar.zst, .tar.gz or .tar)")
+
+
+@contextmanager
+def _open_archive(path, mode, name=None):
+    """Open a streaming tar archive at path for bulk exports, using a mode from _archive_mode
+    
+    name is the archive's final path when path is a temporary one; gzip
+    records it (minus .gz) as the original file name.
+    """
+    with open(path, 'wb') as f:
+        if mode == ZSTANDARD_ARCHIVE_MODE:
+            with zstandard.ZstdCompressor().stream_writer(f, closefd=False) as compressed:
+                with tarfile.open(fileobj=compressed, mode='w|') as tar:
+                    yield tar
+        else:
+            with tarfile.open(name=name or path, mode=mode, fileobj=f) as tar:
+                yield tar
+
+
+def _add_to_archive(tar, member_name, fileobj, size):
+    """Append size bytes from fileobj to tar as member_name"""
+    info = tarfile.TarInfo(member_name)
+    info.size = size
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    tar.addfile(info, fileobj)
+
+
+def _positive_int(value):
+    """argparse type for options that must be an integer >= 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 class SplunkCloudAppExporter:
-    def __init__(self, stack_name, auth_token=None):
+    def __init__(self, stack_name, auth_token=None, use_http2=False, assume_yes=False, validate=None, force=False):
         self.stack_name = stack_name
         self.base_url = f"https://admin.splunk.com/{stack_name}/adminconfig/v2/"
+        # Endpoint URLs built once rather than urljoin()ed on every request
+        self._apps_url = self.base_url + "apps/victoria"
+        self._app_url_tmpl = self._apps_url + "/{}"
+        self._export_url_tmpl = self._apps_url + "/export/download/{}"
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF_FACTOR, status_forcelist=RETRY_STATUSES)
+        )
+        self.session.mount('https://', adapter)
+        # With use_http2, app downloads go over HTTP/2 (requires httpx and h2)
+        self.http2_client = None
+        self._download_errors = DOWNLOAD_ERRORS
+        if use_http2:
+            self.http2_client = self._create_http2_client()
         self.auth_token = auth_token
+        # Unattended-run defaults: answer yes to confirmations, validate
+        # (None asks, True/False without asking), and ignore previous exports
+        self.assume_yes = assume_yes
+        self.validate = validate
+        self.force = force
+        # Serializes console output (and prompts) from export worker threads
+        self._print_lock = threading.Lock()
+        # Serializes appends to a shared --archive
+        self._archive_lock = threading.Lock()
+        # Set while a bulk export routes output through a single writer thread
+        self._output_queue = None
+    
+    def _create_http2_client(self):
+        """Create the httpx HTTP/2 download client, or return None if httpx[http2] is missing
+        
+        TLS verification and environment handling mirror the requests session,
+        so downloads trust the same CAs (including REQUESTS_CA_BUNDLE) as the
+        API calls.
+        """
+        # Optional: httpx (with the h2 extra) is only imported for --http2
+        try:
+            import httpx
+        except ImportError:
+            print("⚠ httpx is not installed (pip install 'httpx[http2]'); downloading over HTTP/1.1")
+            return None
+        
+        settings = self.session.merge_environment_settings(self._apps_url, {}, None, self.session.verify, None)
+        verify = settings['verify']
+        if isinstance(verify, str):
+            # A CA bundle file or directory, e.g. from REQUESTS_CA_BUNDLE
+            if os.path.isdir(verify):
+                verify = ssl.create_default_context(capath=verify)
+            else:
+                verify = ssl.create_default_context(cafile=verify)
+        
+        try:
+            client = httpx.Client(
+                http2=True,
+                follow_redirects=True,
+                verify=verify,
+                trust_env=self.session.trust_env,
+                timeout=HTTP2_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP2_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP2_MAX_CONNECTIONS
+                )
+            )
+        except ImportError:
+            print("⚠ The h2 package is not installed (pip install 'httpx[http2]'); downloading over HTTP/1.1")
+            return None
+        self._download_errors = DOWNLOAD_ERRORS + (httpx.HTTPError,)
+        return client
+    
+    def close(self):
+        """Close the HTTP session and the HTTP/2 download client, if any"""
+        self.session.close()
+        if self.http2_client is not None:
+            self.http2_client.close()
+    
+    def _print(self, *args, sep=' ', end='\n'):
+        """Thread-safe print so lines from parallel exports don't interleave"""
+        output_queue = self._output_queue
+        if output_queue is not None:
+            output_queue.put(sep.join(str(arg) for arg in args) + end)
+            return
+        with self._print_lock:
+            print(*args, sep=sep, end=end)
+    
+    def _prompt(self, message):
+        """Thread-safe input; holds the output lock so the prompt stays visible"""
+        with self._print_lock:
+            return input(message)
+    
+    def _confirm(self, message):
+        """Ask a y/N question, answering yes without blocking when assume_yes is set"""
+        if self.assume_yes:
+            self._print(f"{message}y")
+            return True
+        return self._prompt(message).lower() == 'y'
+    
+    @contextmanager
+    def _buffered_output(self):
+        """Hand _print output to one writer thread that flushes stdout only when idle
+        
+        Worker threads just enqueue their lines instead of contending for the
+        console, and stdout is written in bursts rather than line by line.
+        """
+        output_queue = queue.Queue()
+        line_buffering = getattr(sys.stdout, 'line_buffering', False)
+        if line_buffering and hasattr(sys.stdout, 'reconfigure'):
+            sys.stdout.reconfigure(line_buffering=False)
+        
+        def writer():
+            while True:
+                text = output_queue.get()
+                if text is None:
+                    break
+                sys.stdout.write(text)
+                if output_queue.empty():
+                    sys.stdout.flush()
+            sys.stdout.flush()
+        
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        self._output_queue = output_queue
+        try:
+            yield
+        finally:
+            self._output_queue = None
+            output_queue.put(None)
+            thread.join()
+            if line_buffering and hasattr(sys.stdout, 'reconfigure'):
+                sys.stdout.reconfigure(line_buffering=True)
     
     def authenticate(self):
         """Authenticate with Splunk Cloud Admin Config Service using JWT token"""
@@ -42,6 +546,10 @@ class SplunkCloudAppExporter:
             self.auth_token = os.getenv('SPLUNK_ACS_TOKEN')
             if self.auth_token:
                 print("Using JWT token from SPLUNK_ACS_TOKEN environment variable")
+            elif self.assume_yes:
+                # Unattended runs must not block on a password prompt
+                print("✗ No authentication token provided (use --token or SPLUNK_ACS_TOKEN with --yes)")
+                return False
             else:
                 self.auth_token = getpass.getpass("Enter your ACS JWT authentication token: ")
         
@@ -56,11 +564,15 @@ class SplunkCloudAppExporter:
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        if self.http2_client is not None:
+            self.http2_client.headers.update({
+                'Authorization': f'Bearer {self.auth_token}',
+                'Accept': 'application/json'
+            })
         
         # Test authentication by trying to list apps
         try:
-            test_url = urljoin(self.base_url, "apps/victoria")
-            response = self.session.get(test_url)
+            response = self.session.get(self._apps_url)
             response.raise_for_status()
             
             print("✓ Successfully authenticated with Splunk Cloud ACS")
@@ -88,179 +600,360 @@ class SplunkCloudAppExporter:
                 print(f"✗ Authentication failed: {e}")
             return False
     
-    def list_apps(self):
-        """List all apps in the Splunk Cloud instance (handles pagination)"""
-        apps_url = urljoin(self.base_url, "apps/victoria")
+    def list_apps(self, fields=None, max_workers=DEFAULT_MAX_WORKERS):
+        """List all apps in the Splunk Cloud instance (handles pagination)
+        
+        Follows a server-provided cursor when the response includes one and
+        falls back to offset/count paging otherwise; when the server reports a
+        total, remaining pages are fetched max_workers at a time. fields
+        optionally asks the server to return only those app attributes; servers
+        that ignore the projection return full metadata, and one that rejects
+        it is retried without it. Returns None if any page failed, so callers
+        never act on a truncated list.
+        """
+        apps_url = self._apps_url
         all_apps = []
+        complete = True
         offset = 0
-        count = 100  # Request 100 apps per page (higher than default 30)
+        cursor = None
+        count = LIST_APPS_PAGE_SIZE
+        # The server may silently cap count; track the largest page it actually returns
+        page_size = min(count, LIST_APPS_SERVER_CAP)
+        pages = 0
+        seen_names = set()
         
         while True:
-            params = {
-                'count': count,
-                'offset': offset
-            }
+            params = {'count': count}
+            if fields:
+                params['fields'] = ','.join(fields)
+            if cursor:
+                params['cursor'] = cursor
+            else:
+                params['offset'] = offset
             
             try:
                 response = self.session.get(apps_url, params=params)
                 response.raise_for_status()
                 
-                apps_data = response.json()
+                apps_data = _parse_json(response)
                 apps_batch = apps_data.get('apps', [])
                 
                 if not apps_batch:
                     # No more apps to retrieve
                     break
                 
-                all_apps.extend(apps_batch)
-                
-                # Check if we got fewer apps than requested (indicates last page)
-                if len(apps_batch) < count:
+                # Drop apps already listed (installs/removals shift offsets);
+                # a page with nothing new means the server is not paging
+                new_apps = [app for app in apps_batch if app.get('name') not in seen_names]
+                if not new_apps:
+                    print(f"✗ Server repeated an already listed page (offset {offset})")
+                    complete = False
                     break
-                    
-                # Move to next page
-                offset += count
+                seen_names.update(app.get('name') for app in new_apps)
+                
+                all_apps.extend(new_apps)
+                pages += 1
                 
                 # Optional: show progress for large app lists
-                if offset > count:  # Don't show for first batch
+                if pages > 1:  # Don't show for first batch
                     print(f"  Retrieved {len(all_apps)} apps so far...")
                 
-            except requests.exceptions.RequestException as e:
+                cursor = _next_cursor(apps_data)
+                if cursor and cursor != params.get('cursor'):
+                    continue
+                if 'cursor' in params:
+                    # Cursor chain ended
+                    break
+                
+                # If the first page reports a total, fetch the remaining pages concurrently
+                if pages == 1:
+                    total = _total_count(apps_data, response.headers)
+                    if total is not None:
+                        if total > len(apps_batch):
+                            more_apps, failed_offsets = self._fetch_app_pages(apps_url, len(apps_batch), total, fields, max_workers, seen_names)
+                            all_apps.extend(more_apps)
+                            if failed_offsets:
+                                print(f"✗ Failed to list apps at offsets: {', '.join(map(str, failed_offsets))}")
+                                complete = False
+                            elif len(all_apps) != total:
+                                # Short or overlapping pages (e.g. apps changed mid-listing)
+                                print(f"✗ Listed {len(all_apps)} distinct apps but the server reported {total}")
+                                complete = False
+                        break
+                
+                # Check if we got a short page (indicates last page)
+                if len(apps_batch) < page_size:
+                    break
+                page_size = max(page_size, len(apps_batch))
+                    
+                # Move to next page
+                next_offset = offset + len(apps_batch)
+                if next_offset <= offset:
+                    print(f"✗ App listing offset stopped advancing (offset {offset})")
+                    complete = False
+                    break
+                offset = next_offset
+                
+            except (requests.exceptions.RequestException, ValueError) as e:
+                response = getattr(e, 'response', None)
+                if fields and pages == 0 and response is not None and response.status_code == 400:
+                    print("  Server rejected the fields parameter, listing full app metadata")
+                    fields = None
+                    continue
                 print(f"✗ Failed to list apps (offset {offset}): {e}")
+                complete = False
                 break
         
+        if not complete:
+            print(f"✗ App listing incomplete ({len(all_apps)} apps retrieved)")
+            return None
+        
         print(f"Total apps found: {len(all_apps)}")
         return all_apps
     
+    def _fetch_app_pages(self, apps_url, page_size, total, fields=None, max_workers=DEFAULT_MAX_WORKERS, seen_names=None):
+        """Fetch apps[page_size:total] as parallel offset pages
+        
+        Returns the apps from the pages that loaded, in order and skipping any
+        whose name is already in seen_names (which is updated), and the list
+        of offsets whose page failed.
+        """
+        if seen_names is None:
+            seen_names = set()
+        offsets = list(range(page_size, total, page_size))
+        params = {'count': page_size}
+        if fields:
+            params['fields'] = ','.join(fields)
+        
+        def fetch_page(offset):
+            response = self.session.get(apps_url, params=dict(params, offset=offset))
+            response.raise_for_status()
+            return _parse_json(response).get('apps', [])
+        
+        apps = []
+        failed_offsets = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(offsets))) as executor:
+            futures = [executor.submit(fetch_page, offset) for offset in offsets]
+            for offset, future in zip(offsets, futures):
+                try:
+                    page = future.result()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"✗ Failed to list apps (offset {offset}): {e}")
+                    failed_offsets.append(offset)
+                    continue
+                for app in page:
+                    if app.get('name') not in seen_names:
+                        seen_names.add(app.get('name'))
+                        apps.append(app)
+        
+        print(f"  Retrieved {page_size + len(apps)} of {total} apps")
+        return apps, failed_offsets
+    
     def get_app_info(self, app_name):
         """Get detailed information about a specific app"""
-        app_url = urljoin(self.base_url, f"apps/victoria/{app_name}")
+        app_url = self._app_url_tmpl.format(app_name)
         
         try:
             response = self.session.get(app_url)
             response.raise_for_status()
             
-            return response.json()
+            return _parse_json(response)
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Failed to get app info for '{app_name}': {e}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self._print(f"✗ Failed to get app info for '{app_name}': {e}")
             return None
     
-    def export_app(self, app_name, output_dir=".", local_only=False, include_default=True, include_users=False):
-        """Export/download a specific app"""
-        print(f"Checking if app '{app_name}' exists...")
+    def export_app(self, app_name, output_dir=".", local_only=False, include_default=True, include_users=False, app_info=None, export_params=None, validate=None, manifest=None, skip_unchanged=False, downloaded=None):
+        """Export/download a specific app
         
-        # First, verify the app exists and get its info
-        app_info = self.get_app_info(app_name)
-        if not app_info:
-            print(f"✗ App '{app_name}' not found or inaccessible")
-            return False
+        Returns the path of the package in output_dir, or False on failure.
+        Pass app_info (e.g. the app's entry from list_apps) to skip the lookup
+        request; the caller is then responsible for any Splunkbase filtering.
+        Pass export_params (from _build_export_params) to reuse a prebuilt
+        directory selection; the directory flags are then ignored.
+        validate=None uses the exporter's validate default (asking when that
+        is None too); True/False validates or skips without asking.
+        Pass manifest (from _load_manifest) to record the download and to
+        re-download conditionally when a previous export of the app exists;
+        skip_unchanged also skips it outright when its version hasn't changed.
+        Both are bypassed when the exporter was created with force=True.
+        Pass a list as downloaded to collect the paths actually downloaded,
+        as opposed to previous exports that were kept as unchanged.
+        """
+        confirm_splunkbase = app_info is None
+        if app_info is None:
+            self._print(f"Checking if app '{app_name}' exists...")
+            
+            # First, verify the app exists and get its info
+            app_info = self.get_app_info(app_name)
+            if not app_info:
+                self._print(f"✗ App '{app_name}' not found or inaccessible")
+                return False
         
         # Check if it's a non-splunkbase app
-        app_details = app_info.get('app', {})
+        app_details = app_info.get('app', app_info)
         is_splunkbase = app_details.get('is_splunkbase_app', False)
         
-        if is_splunkbase:
-            print(f"⚠ Warning: '{app_name}' appears to be a Splunkbase app")
-            proceed = input("Do you want to continue anyway? (y/N): ").lower()
-            if proceed != 'y':
-                print("Export cancelled")
+        if is_splunkbase and confirm_splunkbase:
+            self._print(f"⚠ Warning: '{app_name}' appears to be a Splunkbase app")
+            if not self._confirm("Do you want to continue anyway? (y/N): "):
+                self._print("Export cancelled")
                 return False
         
         # Build query parameters for directory selection
-        params = {}
-        if local_only:
-            params['local'] = 'true'
-            params['default'] = 'false'
-            params['users'] = 'false'
-            print(f"  Exporting local/ directory only")
-        else:
-            params['local'] = 'true'  # Always include local
-            params['default'] = 'true' if include_default else 'false'
-            params['users'] = 'true' if include_users else 'false'
-            dirs = []
-            if params['local'] == 'true':
-                dirs.append('local/')
-            if params['default'] == 'true':
-                dirs.append('default/')
-            if params['users'] == 'true':
-                dirs.append('users/')
-            print(f"  Exporting directories: {', '.join(dirs)}")
+        params = export_params
+        if params is None:
+            params = _build_export_params(local_only, include_default, include_users)
+            self._print(f"  Exporting {_describe_export_params(params)}")
+        
+        # Reuse a previous export of this app when it is known to be unchanged
+        previous = None
+        if manifest is not None and not self.force:
+            previous = _previous_export(manifest, app_name, output_dir, params)
+        version = app_details.get('version')
+        if previous and skip_unchanged and version is not None and previous.get('version') == version:
+            output_path = os.path.join(output_dir, previous['filename'])
+            self._print(f"✓ '{app_name}' version {version} already exported to '{output_path}', skipping")
+            return output_path
+        
+        headers = {}
+        if previous:
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
         
         # Export the app
-        export_url = urljoin(self.base_url, f"apps/victoria/export/download/{app_name}")
+        export_url = self._export_url_tmpl.format(app_name)
         
         try:
-            print(f"Downloading app '{app_name}'...")
-            response = self.session.get(export_url, params=params, stream=True)
-            response.raise_for_status()
-            
-            # Determine filename
-            filename = f"{app_name}.spl"
-            if 'content-disposition' in response.headers:
-                import re
-                cd = response.headers['content-disposition']
-                filename_match = re.search(r'filename="?([^"]+)"?', cd)
-                if filename_match:
-                    filename = filename_match.group(1)
-            
-            output_path = os.path.join(output_dir, filename)
-            
-            # Download the file
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            self._print(f"Downloading app '{app_name}'...")
+            with self._open_download(export_url, params, headers) as response:
+                if previous and response.status_code == 304:
+                    output_path = os.path.join(output_dir, previous['filename'])
+                    self._print(f"✓ '{app_name}' unchanged since the last export to '{output_path}', skipping")
+                    return output_path
+                
+                filename = _package_filename(app_name, response.headers)
+                output_path = os.path.join(output_dir, filename)
+                
+                # Download the file
+                file_size = _save_response(response, output_path)
+                
+                if manifest is not None:
+                    manifest[app_name] = {
+                        'filename': filename,
+                        'size': file_size,
+                        'version': version,
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'params': params
+                    }
             
-            file_size = os.path.getsize(output_path)
-            print(f"✓ Successfully downloaded '{app_name}' to '{output_path}' ({file_size} bytes)")
+            self._print(f"✓ Successfully downloaded '{app_name}' to '{output_path}' ({file_size} bytes)")
+            if downloaded is not None:
+                downloaded.append(output_path)
             
             # Optionally run app validation if splunk-appinspect is available
-            if self.check_appinspect_available():
-                validate = input("Would you like to validate the app with splunk-appinspect? (y/N): ").lower()
-                if validate == 'y':
+            if validate is None:
+                validate = self.validate
+            if validate is not False and self.check_appinspect_available():
+                if validate is None:
+                    validate = self._confirm("Would you like to validate the app with splunk-appinspect? (y/N): ")
+                if validate:
                     self.validate_app(output_path)
             
-            return True
+            return output_path
             
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Failed to export app '{app_name}': {e}")
+        except self._download_errors as e:
+            if manifest is not None:
+                # Don't vouch for this app on the next run
+                manifest.pop(app_name, None)
+            self._print(f"✗ Failed to export app '{app_name}': {e}")
             return False
     
-    def check_appinspect_available(self):
-        """Check if splunk-appinspect is available"""
+    def _export_to_archive(self, app_name, archive, export_params):
+        """Download an app package and append it to archive (from _open_archive)
+        
+        Returns the package's member name in the archive, or False on failure.
+        """
+        export_url = self._export_url_tmpl.format(app_name)
+        
         try:
-            import subprocess
-            result = subprocess.run(['splunk-appinspect', '--version'], 
-                                 capture_output=True, text=True)
-            return result.returncode == 0
-        except FileNotFoundError:
+            self._print(f"Downloading app '{app_name}'...")
+            with self._open_download(export_url, export_params) as response:
+                filename = _package_filename(app_name, response.headers)
+                
+                # Parallel workers can't interleave writes into one tar
+                # stream, so spool the package and append it in one go
+                with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_SIZE) as spool:
+                    file_size = _write_response(response, spool)
+                    spool.seek(0)
+                    with self._archive_lock:
+                        _add_to_archive(archive, filename, spool, file_size)
+            
+            self._print(f"✓ Successfully added '{app_name}' to the archive as '{filename}' ({file_size} bytes)")
+            return filename
+            
+        except self._download_errors as e:
+            self._print(f"✗ Failed to export app '{app_name}': {e}")
             return False
     
+    @contextmanager
+    def _open_download(self, url, params, headers=None):
+        """Open a streaming GET for an app package over HTTP/2 when enabled, else requests
+        
+        A 304 Not Modified (for conditional requests) is yielded rather than raised.
+        """
+        if self.http2_client is not None:
+            for attempt in range(RETRY_TOTAL + 1):
+                with self.http2_client.stream('GET', url, params=params, headers=headers) as response:
+                    if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                        if response.status_code != 304:
+                            response.raise_for_status()
+                        yield response
+                        return
+                # Transient server error: back off the same way the session's Retry does
+                time.sleep(RETRY_BACKOFF_FACTOR * (2 ** attempt))
+        else:
+            with self.session.get(url, params=params, headers=headers, stream=True) as response:
+                if response.status_code != 304:
+                    response.raise_for_status()
+                yield response
+    
+    def check_appinspect_available(self):
+        """Check if splunk-appinspect is available (cached after the first call)"""
+        return _appinspect_available()
+    
     def validate_app(self, app_path):
         """Validate the downloaded app using splunk-appinspect"""
         try:
-            import subprocess
-            print(f"Validating {app_path} with splunk-appinspect...")
+            self._print(f"Validating {app_path} with splunk-appinspect...")
             
             cmd = ['splunk-appinspect', 'inspect', app_path, '--mode', 'precert', '--included-tags', 'cloud']
             result = subprocess.run(cmd, capture_output=True, text=True)
             
             if result.returncode == 0:
-                print("✓ App validation passed")
+                self._print("✓ App validation passed")
             else:
-                print("⚠ App validation found issues:")
-                print(result.stdout)
+                self._print("⚠ App validation found issues:")
+                self._print(result.stdout)
                 if result.stderr:
-                    print(result.stderr)
+                    self._print(result.stderr)
             
         except Exception as e:
-            print(f"✗ Failed to validate app: {e}")
+            self._print(f"✗ Failed to validate app: {e}")
     
-    def export_all_apps(self, output_dir=".", local_only=False, include_default=True, include_users=False, skip_splunkbase=True):
-        """Export all apps from the Splunk Cloud instance"""
+    def export_all_apps(self, output_dir=".", local_only=False, include_default=True, include_users=False, skip_splunkbase=True, max_workers=DEFAULT_MAX_WORKERS, skip_unchanged=False, archive_path=None):
+        """Export all apps from the Splunk Cloud instance (max_workers apps at a time)
+        
+        Downloads are recorded in a manifest in output_dir so that re-runs can
+        skip apps the server reports as unchanged (see export_app). With
+        archive_path, all packages are written into that single tar archive
+        instead.
+        """
         print("Retrieving list of all apps...")
-        apps = self.list_apps()
+        apps = self.list_apps(fields=EXPORT_APP_FIELDS, max_workers=max_workers)
         
         if not apps:
             print("✗ No apps found or unable to retrieve app list")
@@ -268,6 +961,7 @@ class SplunkCloudAppExporter:
         
         # Filter apps if needed
         apps_to_export = []
+        apps_by_name = {}
         skipped_apps = []
         
         for app in apps:
@@ -278,7 +972,10 @@ class SplunkCloudAppExporter:
                 skipped_apps.append(f"{app_name} (Splunkbase)")
                 continue
                 
+            if app_name in apps_by_name:
+                continue  # Listed twice; exporting it twice would race on the same file
             apps_to_export.append(app_name)
+            apps_by_name[app_name] = app
         
         print(f"Found {len(apps_to_export)} apps to export")
         if skipped_apps:
@@ -291,22 +988,70 @@ class SplunkCloudAppExporter:
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         
-        # Export each app
-        successful_exports = []
-        failed_exports = []
+        # Directory selection is the same for every app
+        export_params = _build_export_params(local_only, include_default, include_users)
+        print(f"Exporting {_describe_export_params(export_params)}")
         
-        for i, app_name in enumerate(apps_to_export, 1):
-            print(f"\n[{i}/{len(apps_to_export)}] Exporting {app_name}...")
-            
-            success = self.export_app(
+        # Export apps concurrently; all workers share self.session's connection pool
+        def export_one(i, app_name):
+            self._print(f"\n[{i}/{len(apps_to_export)}] Exporting {app_name}...")
+            if archive is not None:
+                return self._export_to_archive(app_name, archive, export_params)
+            return self.export_app(
                 app_name, 
                 output_dir, 
-                local_only=local_only,
-                include_default=include_default,
-                include_users=include_users
+                app_info=apps_by_name[app_name],
+                export_params=export_params,
+                validate=False,  # Offered once for all apps after the downloads finish
+                manifest=manifest,
+                skip_unchanged=skip_unchanged,
+                downloaded=downloaded
             )
+        
+        manifest = None if archive_path else _load_manifest(output_dir)
+        results = {}
+        downloaded = []
+        with ExitStack() as stack:
+            archive = None
+            if archive_path:
+                # Written alongside and only moved into place if something was exported
+                try:
+                    archive = stack.enter_context(_open_archive(archive_path + '.part', _archive_mode(archive_path), name=archive_path))
+                except (ValueError, OSError) as e:
+                    print(f"✗ Failed to open archive: {e}")
+                    return False
             
-            if success:
+            with self._buffered_output(), ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(export_one, i, app_name): i
+                    for i, app_name in enumerate(apps_to_export, 1)
+                }
+                try:
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        try:
+                            results[i] = future.result()
+                        except Exception as e:
+                            self._print(f"✗ Unexpected error exporting '{apps_to_export[i - 1]}': {e}")
+                            results[i] = False
+                except BaseException:
+                    # Drop queued exports (e.g. on Ctrl-C) so shutdown only waits for running ones
+                    for future in futures:
+                        future.cancel()
+                    raise
+        
+        if manifest is not None:
+            try:
+                _save_manifest(output_dir, manifest)
+            except OSError as e:
+                print(f"⚠ Failed to save export manifest: {e}")
+        
+        # Collect results in the original app order
+        successful_exports = []
+        failed_exports = []
+        
+        for i, app_name in enumerate(apps_to_export, 1):
+            if results.get(i):
                 successful_exports.append(app_name)
             else:
                 failed_exports.append(app_name)
@@ -325,6 +1070,31 @@ class SplunkCloudAppExporter:
             for app in failed_exports:
                 print(f"  ✗ {app}")
         
+        if archive_path:
+            try:
+                if successful_exports:
+                    os.replace(archive_path + '.part', archive_path)
+                    print(f"Archive written to '{archive_path}'")
+                else:
+                    os.remove(archive_path + '.part')
+                    print("✗ No apps were exported; archive not written")
+            except OSError as e:
+                print(f"✗ Failed to finish archive: {e}")
+                return False
+            return len(failed_exports) == 0
+        
+        # Optionally validate everything downloaded by this run in one pass;
+        # packages kept from a previous export were offered for validation then
+        downloaded_paths = set(downloaded)
+        exported_paths = [results[i] for i in sorted(results) if results[i] in downloaded_paths]
+        validate = self.validate
+        if exported_paths and validate is not False and self.check_appinspect_available():
+            if validate is None:
+                validate = self._confirm(f"\nWould you like to validate the {len(exported_paths)} downloaded apps with splunk-appinspect? (y/N): ")
+            if validate:
+                for output_path in exported_paths:
+                    self.validate_app(output_path)
+        
         return len(failed_exports) == 0
 
 def main():
@@ -341,80 +1111,114 @@ def main():
     parser.add_argument('--include-default', action='store_true', default=True, help='Include default/ directory (default: true)')
     parser.add_argument('--include-users', action='store_true', help='Include users/ directory')
     parser.add_argument('--include-splunkbase', action='store_true', help='Include Splunkbase apps when using --export-all')
+    parser.add_argument('--skip-unchanged', action='store_true', help='With --export-all, skip apps whose version matches the previous export in --output-dir without downloading them')
+    parser.add_argument('--archive', help='With --export-all, write all apps into this single .tar.zst, .tar.gz or .tar archive instead of separate .spl files')
+    parser.add_argument('--force', action='store_true', help='Re-download every app, ignoring previous exports in --output-dir')
+    parser.add_argument('--yes', '-y', action='store_true', help='Answer yes to all confirmation prompts (for unattended runs)')
+    parser.add_argument('--no-validate', action='store_true', help='Never offer splunk-appinspect validation')
+    parser.add_argument('--http2', action='store_true', help="Download apps over HTTP/2 (requires pip install 'httpx[http2]')")
+    parser.add_argument('--max-workers', type=_positive_int, default=DEFAULT_MAX_WORKERS, help=f'Number of apps to download in parallel with --export-all (default: {DEFAULT_MAX_WORKERS})')
     
     args = parser.parse_args()
     
+    # Reject option combinations that would otherwise be ignored or fail late
+    if args.archive:
+        if not args.export_all:
+            parser.error("--archive requires --export-all")
+        if args.skip_unchanged or args.force:
+            parser.error("--skip-unchanged and --force don't apply to --archive exports")
+        try:
+            _archive_mode(args.archive)
+        except ValueError as e:
+            parser.error(str(e))
+    
     # Create exporter instance
-    exporter = SplunkCloudAppExporter(args.stack, args.token)
-    
-    # Authenticate
-    if not exporter.authenticate():
-        sys.exit(1)
-    
-    # List apps if requested
-    if args.list_apps:
-        print("\nAvailable apps:")
-        apps = exporter.list_apps()
-        if apps:
-            for app in apps:
-                name = app.get('name', 'Unknown')
-                title = app.get('title', '')
-                is_splunkbase = app.get('is_splunkbase_app', False)
-                status = "📦 Splunkbase" if is_splunkbase else "🔧 Custom"
-                print(f"  {status} {name} - {title}")
-        else:
-            print("  No apps found or unable to retrieve app list")
+    exporter = SplunkCloudAppExporter(
+        args.stack,
+        args.token,
+        use_http2=args.http2,
+        assume_yes=args.yes,
+        validate=False if args.no_validate else None,
+        force=args.force
+    )
+    
+    try:
+        # Authenticate
+        if not exporter.authenticate():
+            sys.exit(1)
+    
+        # List apps if requested
+        if args.list_apps:
+            print("\nAvailable apps:")
+            apps = exporter.list_apps()
+            if apps:
+                for app in apps:
+                    name = app.get('name', 'Unknown')
+                    title = app.get('title', '')
+                    is_splunkbase = app.get('is_splunkbase_app', False)
+                    status = "📦 Splunkbase" if is_splunkbase else "🔧 Custom"
+                    print(f"  {status} {name} - {title}")
+            else:
+                print("  No apps found or unable to retrieve app list")
         
-        if not args.app and not args.export_all:
-            sys.exit(0)
+            if not args.app and not args.export_all:
+                sys.exit(0)
     
-    # Create output directory if it doesn't exist
-    os.makedirs(args.output_dir, exist_ok=True)
+        # Create output directory if it doesn't exist
+        os.makedirs(args.output_dir, exist_ok=True)
     
-    # Handle export all apps
-    if args.export_all:
-        print("\nExporting all apps...")
-        if args.local_only:
-            print("Using --local-only: exporting only local/ directories")
+        # Handle export all apps
+        if args.export_all:
+            print("\nExporting all apps...")
+            if args.local_only:
+                print("Using --local-only: exporting only local/ directories")
         
-        success = exporter.export_all_apps(
-            output_dir=args.output_dir,
-            local_only=args.local_only,
-            include_default=args.include_default and not args.local_only,
-            include_users=args.include_users,
-            skip_splunkbase=not args.include_splunkbase
-        )
+            success = exporter.export_all_apps(
+                output_dir=args.output_dir,
+                local_only=args.local_only,
+                include_default=args.include_default and not args.local_only,
+                include_users=args.include_users,
+                skip_splunkbase=not args.include_splunkbase,
+                max_workers=args.max_workers,
+                skip_unchanged=args.skip_unchanged,
+                archive_path=args.archive
+            )
         
-        if success:
-            print("\n✓ All apps exported successfully!")
-        else:
-            print("\n⚠ Some apps failed to export (see summary above)")
-            sys.exit(1)
+            if success:
+                print("\n✓ All apps exported successfully!")
+            else:
+                print("\n⚠ Some apps failed to export (see summary above)")
+                sys.exit(1)
         
-        sys.exit(0)
+            sys.exit(0)
     
-    # Handle single app export
-    app_name = args.app
-    if not app_name:
-        app_name = input("\nEnter the name of the app to export: ").strip()
-        if not app_name:
-            print("No app name provided")
+        # Handle single app export
+        app_name = args.app
+        if not app_name and args.yes:
+            print("No app name provided (use --app with --yes)")
             sys.exit(1)
+        if not app_name:
+            app_name = input("\nEnter the name of the app to export: ").strip()
+            if not app_name:
+                print("No app name provided")
+                sys.exit(1)
     
-    # Export the single app
-    success = exporter.export_app(
-        app_name, 
-        args.output_dir,
-        local_only=args.local_only,
-        include_default=args.include_default and not args.local_only,
-        include_users=args.include_users
-    )
+        # Export the single app
+        success = exporter.export_app(
+            app_name, 
+            args.output_dir,
+            local_only=args.local_only,
+            include_default=args.include_default and not args.local_only,
+            include_users=args.include_users
+        )
     
-    if success:
-        print(f"\n✓ App '{app_name}' exported successfully!")
-    else:
-        print(f"\n✗ Failed to export app '{app_name}'")
-        sys.exit(1)
+        if success:
+            print(f"\n✓ App '{app_name}' exported successfully!")
+        else:
+            print(f"\n✗ Failed to export app '{app_name}'")
+            sys.exit(1)
+    finally:
+        exporter.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file